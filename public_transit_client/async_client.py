@@ -0,0 +1,313 @@
+import asyncio
+import logging
+from datetime import datetime
+from types import TracebackType
+from typing import Any, Self, Sequence
+from urllib.parse import quote
+
+import aiohttp
+
+from public_transit_client.client import (
+    _CONN_LIST_ADAPTER,
+    _DEP_LIST_ADAPTER,
+    _DIST_LIST_ADAPTER,
+    _EP_CONNECTIONS,
+    _EP_DEPARTURES_TMPL,
+    _EP_ISOLINES,
+    _EP_NEAREST,
+    _EP_ROUTING,
+    _EP_SCHEDULE,
+    _EP_SEARCH,
+    _EP_STOP_TMPL,
+    _HEADERS,
+    _OPTIONAL_STOP_ADAPTER,
+    _STOP_LIST_ADAPTER,
+    _STOPCONN_LIST_ADAPTER,
+    PublicTransitClient,
+    PublicTransitClientException,
+    _flatten_params,
+    _stop_id,
+)
+from public_transit_client.model import (
+    APIError,
+    Connection,
+    Coordinate,
+    Departure,
+    DistanceToStop,
+    QueryConfig,
+    RouterInfo,
+    ScheduleInfo,
+    SearchType,
+    Stop,
+    StopConnection,
+    TimeType,
+)
+
+LOG = logging.getLogger(__name__)
+
+
+class AsyncPublicTransitClient:
+    """An asynchronous client to interact with the public transit API.
+
+    All requests share a single aiohttp session, so independent queries can be awaited concurrently, e.g. with
+    `asyncio.gather`, instead of paying one round trip after another.
+    """
+
+    def __init__(self, host: str, connection_limit: int = 32):
+        """Initialize the AsyncPublicTransitClient with the API host URL.
+
+        Args:
+            host (str): The base URL of the public transit API.
+            connection_limit (int, optional): The maximum number of simultaneous connections. Defaults to 32.
+        """
+        self.host = host
+        self._connection_limit = connection_limit
+        self._session: aiohttp.ClientSession | None = None
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the underlying HTTP session and release pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Returns the shared session, creating it inside the running event loop on first use."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._connection_limit, ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(connector=connector, headers=_HEADERS)
+        return self._session
+
+    async def _send_get_request_bytes(
+        self, endpoint: str, params: dict[str, Any] | None = None
+    ) -> bytes:
+        """Sends a GET request to the API and returns the raw JSON body of the response."""
+        url = f"{self.host}{endpoint}"
+        LOG.debug("Sending GET request to %s with params %s", url, params)
+        async with self._get_session().get(
+            url, params=_flatten_params(params)
+        ) as response:
+            body = await response.read()
+            if response.status == 200:
+                return body
+
+            try:
+                error_details = APIError.model_validate_json(body)
+                LOG.error("API error occurred: %s", error_details)
+                raise PublicTransitClientException(error_details)
+            except ValueError:
+                if LOG.isEnabledFor(logging.ERROR):
+                    LOG.error(
+                        "Non-JSON response received: %s",
+                        body.decode(errors="replace"),
+                    )
+                response.raise_for_status()
+            return body
+
+    async def get_schedule_info(self) -> ScheduleInfo:
+        """Retrieve information about the schedule API."""
+        body = await self._send_get_request_bytes(_EP_SCHEDULE)
+        return ScheduleInfo.model_validate_json(body)
+
+    async def search_stops(
+        self, query: str, limit: int = 10, search_type: SearchType = SearchType.CONTAINS
+    ) -> list[Stop]:
+        """Search for stops by a query string.
+
+        Args:
+            query (str): The search query for the stop name.
+            limit (int, optional): The maximum number of stops to return. Defaults to 10.
+            search_type (SearchType, optional): The type of search to perform (EXACT, CONTAINS, etc.). Defaults to CONTAINS.
+
+        Returns:
+            list[Stop]: A list of Stop objects that match the query.
+        """
+        params = PublicTransitClient._build_search_params(query, limit, search_type)
+        body = await self._send_get_request_bytes(_EP_SEARCH, params)
+        return _STOP_LIST_ADAPTER.validate_json(body)
+
+    async def nearest_stops(
+        self, coordinate: Coordinate, limit: int = 10, max_distance: int = 1000
+    ) -> list[DistanceToStop]:
+        """Find the nearest stops to a given coordinate.
+
+        Args:
+            coordinate (Coordinate): The geographical coordinate to search from.
+            limit (int, optional): The maximum number of stops to return. Defaults to 10.
+            max_distance (int, optional): The maximum distance (in meters) from the coordinate to search. Defaults to 1000.
+
+        Returns:
+            list[DistanceToStop]: A list of DistanceToStop objects representing nearby stops.
+        """
+        params = PublicTransitClient._build_nearest_params(
+            coordinate, limit, max_distance
+        )
+        body = await self._send_get_request_bytes(_EP_NEAREST, params)
+        return _DIST_LIST_ADAPTER.validate_json(body)
+
+    async def get_stop(self, stop_id: str) -> Stop | None:
+        """Retrieve details of a specific stop by its ID.
+
+        Args:
+            stop_id (str): The unique identifier of the stop.
+
+        Returns:
+            Stop | None: A Stop object if found, otherwise None.
+        """
+        body = await self._send_get_request_bytes(
+            _EP_STOP_TMPL.format(quote(stop_id, safe=""))
+        )
+        return _OPTIONAL_STOP_ADAPTER.validate_json(body)
+
+    async def get_next_departures(
+        self,
+        stop: str | Stop,
+        departure: datetime | None = None,
+        limit: int = 10,
+        until: datetime | None = None,
+    ) -> list[Departure]:
+        """Retrieve the next departures from a specific stop.
+
+        Args:
+            stop (str | Stop): The stop ID or Stop object to get departures from.
+            departure (datetime, optional): The starting time for the departures search. Defaults to None (=now).
+            limit (int, optional): The maximum number of departures to return. Defaults to 10.
+            until (datetime, optional): The end time for the departures search. Defaults to None.
+
+        Returns:
+            list[Departure]: A list of Departure objects.
+        """
+        params = PublicTransitClient._build_departures_params(departure, limit, until)
+        body = await self._send_get_request_bytes(
+            _EP_DEPARTURES_TMPL.format(quote(_stop_id(stop), safe="")), params
+        )
+        return _DEP_LIST_ADAPTER.validate_json(body)
+
+    async def get_router_info(self) -> RouterInfo:
+        """Retrieve information about the routing API."""
+        body = await self._send_get_request_bytes(_EP_ROUTING)
+        return RouterInfo.model_validate_json(body)
+
+    async def get_connections(
+        self,
+        source: Stop | Coordinate | str | tuple[float, float],
+        target: str | Stop | Coordinate | tuple[float, float],
+        time: datetime | None = None,
+        time_type: TimeType = TimeType.DEPARTURE,
+        query_config: QueryConfig | None = None,
+    ) -> list[Connection]:
+        """Retrieve a list of possible connections between two stops and or locations.
+
+        Args:
+            source (Stop | Coordinate | str | tuple[float, float]): The starting Stop object, Coordinate object, Stop ID or
+                Coordinates tuple.
+            target (Stop | Coordinate | str | tuple[float, float]): The destination Stop object, Coordinate object,
+                Stop ID or Coordinates tuple.
+            time (datetime, optional): The time for the connection search. Defaults to None (=now).
+            time_type (TimeType, optional): Whether the time is for departure or arrival. Defaults to DEPARTURE.
+            query_config (QueryConfig, optional): Additional query configuration. Defaults to None.
+
+        Returns:
+            list[Connection]: A list of Connection objects representing the possible routes.
+        """
+        params = PublicTransitClient._build_params_dict(
+            source,
+            target,
+            time=time,
+            time_type=time_type,
+            query_config=query_config,
+        )
+        body = await self._send_get_request_bytes(_EP_CONNECTIONS, params)
+        return _CONN_LIST_ADAPTER.validate_json(body)
+
+    async def get_connections_matrix(
+        self,
+        sources: Sequence[Stop | Coordinate | str | tuple[float, float]],
+        targets: Sequence[Stop | Coordinate | str | tuple[float, float]],
+        time: datetime | None = None,
+        time_type: TimeType = TimeType.DEPARTURE,
+        query_config: QueryConfig | None = None,
+    ) -> list[list[list[Connection]]]:
+        """Retrieve the connections between every source and every target.
+
+        All source / target pairs are queried concurrently over the shared session, so the whole matrix takes about
+        as long as the slowest single query instead of the sum of all of them.
+
+        Args:
+            sources (Sequence[Stop | Coordinate | str | tuple[float, float]]): The starting Stop objects, Coordinate
+                objects, Stop IDs or Coordinates tuples.
+            targets (Sequence[Stop | Coordinate | str | tuple[float, float]]): The destination Stop objects, Coordinate
+                objects, Stop IDs or Coordinates tuples.
+            time (datetime, optional): The time for the connection search, shared by all pairs. Defaults to None (=now).
+            time_type (TimeType, optional): Whether the time is for departure or arrival. Defaults to DEPARTURE.
+            query_config (QueryConfig, optional): Additional query configuration. Defaults to None.
+
+        Returns:
+            list[list[list[Connection]]]: The connections from sources[i] to targets[j] at index [i][j].
+
+        Raises:
+            PublicTransitClientException: If a query fails, in which case the queries still pending are cancelled.
+        """
+        if not targets:
+            return [[] for _ in sources]
+        if time is None:
+            time = datetime.now()
+
+        tasks = [
+            asyncio.ensure_future(
+                self.get_connections(source, target, time, time_type, query_config)
+            )
+            for source in sources
+            for target in targets
+        ]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # gather does not cancel the other pairs when one fails, so stop them instead of leaving them running
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        num_targets = len(targets)
+        return [
+            results[i : i + num_targets] for i in range(0, len(results), num_targets)
+        ]
+
+    async def get_isolines(
+        self,
+        source: Stop | Coordinate | str | tuple[float, float],
+        time: datetime | None = None,
+        time_type: TimeType = TimeType.DEPARTURE,
+        query_config: QueryConfig | None = None,
+        return_connections: bool = False,
+    ) -> list[StopConnection]:
+        """Retrieve isolines (areas reachable within a certain time) from a specific stop / location.
+
+        Args:
+            source (Stop | Coordinate | str | tuple[float, float]): The starting Stop object, Coordinate object, Stop ID or
+                Coordinates tuple.
+            time (datetime, optional): The time for the isoline calculation. Defaults to None (=now).
+            time_type (TimeType, optional): Whether the time is for departure or arrival. Defaults to DEPARTURE.
+            query_config (QueryConfig, optional): Additional query configuration. Defaults to None.
+            return_connections (bool, optional): Whether to return detailed connections. Defaults to False.
+
+        Returns:
+            list[StopConnection]: A list of StopConnection objects representing the reachable areas.
+        """
+        params = PublicTransitClient._build_isolines_params(
+            source, time, time_type, query_config, return_connections
+        )
+        body = await self._send_get_request_bytes(_EP_ISOLINES, params)
+        return _STOPCONN_LIST_ADAPTER.validate_json(body)
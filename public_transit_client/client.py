@@ -1,9 +1,22 @@
 import logging
+import threading
 from datetime import datetime
-from typing import Any
+from types import TracebackType
+from typing import Any, Callable, Iterator, Self, TypeVar
+from urllib.parse import quote
 
 import requests
+import urllib3
+from cachetools import Cache, LRUCache, TTLCache
+from pydantic import TypeAdapter
 from requests import Response
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import ijson  # type: ignore[import-untyped]
+except ImportError:  # pragma: no cover
+    ijson = None
 
 from public_transit_client.model import (
     APIError,
@@ -22,6 +35,126 @@ from public_transit_client.model import (
 
 LOG = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
+
+# marks a cache miss, since get_stop legitimately caches None
+_MISSING = object()
+
+_EP_SCHEDULE = "/schedule"
+_EP_SEARCH = "/schedule/stops/autocomplete"
+_EP_NEAREST = "/schedule/stops/nearest"
+_EP_STOP_TMPL = "/schedule/stops/{}"
+_EP_DEPARTURES_TMPL = "/schedule/stops/{}/departures"
+_EP_ROUTING = "/routing"
+_EP_CONNECTIONS = "/routing/connections"
+_EP_ISOLINES = "/routing/isolines"
+
+# requests and aiohttp already ask for gzip / deflate compressed, keep-alive connections by default
+_HEADERS = {"Accept": "application/json"}
+
+_OPTIONAL_STOP_ADAPTER = TypeAdapter(Stop | None)
+_STOP_LIST_ADAPTER = TypeAdapter(list[Stop])
+_DIST_LIST_ADAPTER = TypeAdapter(list[DistanceToStop])
+_DEP_LIST_ADAPTER = TypeAdapter(list[Departure])
+_CONN_LIST_ADAPTER = TypeAdapter(list[Connection])
+_STOPCONN_LIST_ADAPTER = TypeAdapter(list[StopConnection])
+
+
+def _format_date_time(date_time: datetime) -> str:
+    """Formats a datetime as the local ISO date time expected by the API, dropping any UTC offset."""
+    if date_time.tzinfo is not None:
+        date_time = date_time.replace(tzinfo=None)
+    return date_time.isoformat(timespec="seconds")
+
+
+def _flatten_params(params: dict[str, Any] | None) -> list[tuple[str, str]] | None:
+    """Flattens list values into repeated query parameters for HTTP clients that do not accept lists."""
+    if params is None:
+        return None
+
+    query: list[tuple[str, str]] = []
+    for key, value in params.items():
+        if isinstance(value, list):
+            query.extend((key, str(item)) for item in value)
+        else:
+            query.append((key, str(value)))
+    return query
+
+
+def _stop_id(stop: str | Stop) -> str:
+    """Returns the ID of a stop given either as Stop object or as ID."""
+    return stop.id if isinstance(stop, Stop) else stop
+
+
+_SOURCE_KEYS = ("sourceStopId", "sourceLatitude", "sourceLongitude")
+_TARGET_KEYS = ("targetStopId", "targetLatitude", "targetLongitude")
+
+
+def _encode_stop_id(params: dict[str, Any], keys: tuple[str, ...], stop_id: str):
+    params[keys[0]] = stop_id
+
+
+def _encode_stop(params: dict[str, Any], keys: tuple[str, ...], stop: Stop):
+    params[keys[0]] = stop.id
+
+
+def _encode_coordinate(
+    params: dict[str, Any], keys: tuple[str, ...], coordinate: Coordinate
+):
+    params[keys[1]] = coordinate.latitude
+    params[keys[2]] = coordinate.longitude
+
+
+def _encode_tuple(
+    params: dict[str, Any], keys: tuple[str, ...], coordinate: tuple[float, float]
+):
+    params[keys[1]] = coordinate[0]
+    params[keys[2]] = coordinate[1]
+
+
+# query config fields and the names of their query parameters
+_QUERY_CONFIG_PARAMS = (
+    ("max_walking_duration", "maxWalkingDuration"),
+    ("max_num_transfers", "maxTransferNumber"),
+    ("max_travel_time", "maxTravelTime"),
+    ("min_transfer_duration", "minTransferTime"),
+)
+_QUERY_CONFIG_FLAGS = (
+    ("accessibility", "wheelchairAccessible"),
+    ("bikes", "bikesAllowed"),
+)
+
+_LOCATION_ENCODERS: dict[
+    type, Callable[[dict[str, Any], tuple[str, ...], Any], None]
+] = {
+    str: _encode_stop_id,
+    Stop: _encode_stop,
+    Coordinate: _encode_coordinate,
+    tuple: _encode_tuple,
+}
+
+
+def _encode_location(
+    params: dict[str, Any],
+    keys: tuple[str, ...],
+    location: Stop | Coordinate | str | tuple[float, float],
+):
+    """Adds a stop ID or coordinate location to the query parameters, dispatching on the exact type first."""
+    encoder = _LOCATION_ENCODERS.get(type(location))
+    if encoder is None:
+        # subclasses (e.g. named tuples) fall back to the first registered base class
+        encoder = next(
+            (
+                _LOCATION_ENCODERS[cls]
+                for cls in type(location).__mro__
+                if cls in _LOCATION_ENCODERS
+            ),
+            None,
+        )
+        if encoder is None:
+            raise TypeError(f"Unsupported location type: {type(location).__name__}")
+    encoder(params, keys, location)
+
 
 class PublicTransitClientException(Exception):
     """Exception raised for errors in the Public Transit Client."""
@@ -39,39 +172,194 @@ class PublicTransitClientException(Exception):
 class PublicTransitClient:
     """A client to interact with the public transit API."""
 
-    def __init__(self, host: str):
+    def __init__(
+        self,
+        host: str,
+        cache_size: int = 1024,
+        cache_ttl: float | None = None,
+        coordinate_precision: int = 5,
+        max_retries: int = 3,
+        timeout: float | None = None,
+        low_overhead: bool = False,
+    ):
         """Initialize the PublicTransitClient with the API host URL.
 
+        Responses of the stop lookup and info endpoints are cached per client instance, since they do not change
+        while a schedule is loaded. Departure and routing queries are never cached. The cache is guarded by a lock,
+        so a client can be shared between threads.
+
         Args:
             host (str): The base URL of the public transit API.
+            cache_size (int, optional): The maximum number of cached responses, 0 disables caching. Defaults to 1024.
+            cache_ttl (float, optional): The time in seconds after which cached responses expire. Defaults to None
+                (=never).
+            coordinate_precision (int, optional): The number of decimals coordinates of nearest stop queries are
+                rounded to when caching is enabled, so that lookups for almost identical locations share a cache
+                entry. Defaults to 5 (~1 m).
+            max_retries (int, optional): The number of times a request is retried on connection errors or 502, 503
+                and 504 responses, with exponential backoff. Defaults to 3.
+            timeout (float, optional): The connect and read timeout of a request in seconds. Defaults to None (=wait
+                indefinitely).
+            low_overhead (bool, optional): Send requests directly through a urllib3 PoolManager instead of a
+                requests Session, which avoids the per-request object construction of requests. Worthwhile when the
+                API is close by (e.g. same data center) and round trips are short. Isolines are not streamed in this
+                mode. Defaults to False.
         """
         self.host = host
+        self.coordinate_precision = coordinate_precision
+        self._timeout = timeout
+        self._cache: Cache | None = None
+        self._cache_lock = threading.Lock()
+        if cache_size > 0:
+            self._cache = (
+                LRUCache(maxsize=cache_size)
+                if cache_ttl is None
+                else TTLCache(maxsize=cache_size, ttl=cache_ttl)
+            )
+        self._session = requests.Session()
+        self._session.headers.update(_HEADERS)
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=0.2,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=32, max_retries=retry)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._http: urllib3.PoolManager | None = None
+        if low_overhead:
+            self._http = urllib3.PoolManager(
+                num_pools=4,
+                maxsize=32,
+                retries=retry,
+                timeout=timeout,
+                headers={**_HEADERS, "Accept-Encoding": "gzip, deflate"},
+            )
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying HTTP session and release pooled connections."""
+        self._session.close()
+        if self._http is not None:
+            self._http.clear()
+
+    def clear_cache(self) -> None:
+        """Remove all cached responses."""
+        if self._cache is not None:
+            with self._cache_lock:
+                self._cache.clear()
+
+    def _send_cached_request(
+        self,
+        endpoint: str,
+        params: dict[str, Any] | None,
+        validate: Callable[[bytes], _T],
+    ) -> _T:
+        """Sends a GET request and caches the validated result, so cache hits skip decoding."""
+        cache = self._cache
+        if cache is None:
+            return validate(self._send_get_request_bytes(endpoint, params))
+
+        cache_key = self._build_cache_key(endpoint, params)
+        # cachetools caches are not thread-safe, and a TTLCache entry may expire between a check and a read
+        with self._cache_lock:
+            cached = cache.get(cache_key, _MISSING)
+        if cached is not _MISSING:
+            LOG.debug("Cache hit for %s with params %s", endpoint, params)
+            # models are frozen, but lists are copied so callers cannot alter the cached entry
+            return list(cached) if isinstance(cached, list) else cached  # type: ignore[return-value]
+
+        result = validate(self._send_get_request_bytes(endpoint, params))
+        with self._cache_lock:
+            cache[cache_key] = list(result) if isinstance(result, list) else result
+        return result
+
+    def _send_get_request_bytes(
+        self, endpoint: str, params: dict[str, Any] | None = None
+    ) -> bytes:
+        """Sends a GET request to the API and returns the raw JSON body of the response."""
+        if self._http is None:
+            return self._handle_response(self._get(endpoint, params))
+        return self._send_low_overhead_request(self._http, endpoint, params)
+
+    def _get(
+        self, endpoint: str, params: dict[str, Any] | None = None, stream: bool = False
+    ) -> Response:
+        """Sends a GET request to the API and returns the raw response."""
+        url = f"{self.host}{endpoint}"
+        LOG.debug("Sending GET request to %s with params %s", url, params)
+        return self._session.get(
+            url, params=params, stream=stream, timeout=self._timeout
+        )
 
-    def _send_get_request(self, endpoint: str, params: dict[str, Any] | None = None):
-        """Sends a GET request to the API and handles the response."""
+    def _send_low_overhead_request(
+        self,
+        http: urllib3.PoolManager,
+        endpoint: str,
+        params: dict[str, Any] | None = None,
+    ) -> bytes:
+        """Sends a GET request through the urllib3 pool manager and returns the raw body of the response."""
         url = f"{self.host}{endpoint}"
-        LOG.debug(f"Sending GET request to {url} with params {params}")
-        response = requests.get(url, params=params)
-        return self._handle_response(response)
+        LOG.debug("Sending GET request to %s with params %s", url, params)
+        response = http.request("GET", url, fields=_flatten_params(params))
+        if response.status == 200:
+            return response.data
+
+        # errors are rare, wrap them so that they are reported exactly like on the requests path
+        error_response = Response()
+        error_response.status_code = response.status
+        error_response.reason = response.reason or ""
+        error_response.url = url
+        error_response._content = response.data
+        return self._handle_response(error_response)
+
+    @staticmethod
+    def _build_cache_key(
+        endpoint: str, params: dict[str, Any] | None
+    ) -> tuple[str, tuple[tuple[str, Any], ...]]:
+        """Builds a hashable cache key from the endpoint and its query parameters."""
+        if not params:
+            return endpoint, ()
+        return endpoint, tuple(
+            sorted(
+                (key, tuple(value) if isinstance(value, list) else value)
+                for key, value in params.items()
+            )
+        )
 
     @staticmethod
-    def _handle_response(response: Response):
-        """Handles the response from the API."""
+    def _handle_response(response: Response) -> bytes:
+        """Handles the response from the API and returns its raw body."""
         if response.status_code == 200:
-            return response.json()
+            return response.content
         else:
             try:
-                error_details = APIError(**response.json())
-                LOG.error(f"API error occurred: {error_details}")
+                error_details = APIError.model_validate_json(response.content)
+                LOG.error("API error occurred: %s", error_details)
                 raise PublicTransitClientException(error_details)
             except ValueError:
-                LOG.error(f"Non-JSON response received: {response.text}")
+                if LOG.isEnabledFor(logging.ERROR):
+                    LOG.error("Non-JSON response received: %s", response.text)
                 response.raise_for_status()
+        return response.content
 
     def get_schedule_info(self) -> ScheduleInfo:
         """Retrieve information about the schedule API."""
-        data = self._send_get_request("/schedule")
-        return ScheduleInfo(**data)
+        return self._send_cached_request(
+            _EP_SCHEDULE, None, ScheduleInfo.model_validate_json
+        )
 
     def search_stops(
         self, query: str, limit: int = 10, search_type: SearchType = SearchType.CONTAINS
@@ -86,13 +374,10 @@ class PublicTransitClient:
         Returns:
             list[Stop]: A list of Stop objects that match the query.
         """
-        params: dict[str, Any] = {
-            "query": query,
-            "limit": str(limit),
-            "searchType": search_type.name,
-        }
-        data = self._send_get_request("/schedule/stops/autocomplete", params)
-        return [Stop(**stop) for stop in data]
+        params = self._build_search_params(query, limit, search_type)
+        return self._send_cached_request(
+            _EP_SEARCH, params, _STOP_LIST_ADAPTER.validate_json
+        )
 
     def nearest_stops(
         self, coordinate: Coordinate, limit: int = 10, max_distance: int = 1000
@@ -107,14 +392,15 @@ class PublicTransitClient:
         Returns:
             list[DistanceToStop]: A list of DistanceToStop objects representing nearby stops.
         """
-        params = {
-            "latitude": str(coordinate.latitude),
-            "longitude": str(coordinate.longitude),
-            "limit": str(limit),
-            "maxDistance": str(max_distance),
-        }
-        data = self._send_get_request("/schedule/stops/nearest", params)
-        return [DistanceToStop(**stop) for stop in data]
+        params = self._build_nearest_params(
+            coordinate,
+            limit,
+            max_distance,
+            precision=self.coordinate_precision if self._cache is not None else None,
+        )
+        return self._send_cached_request(
+            _EP_NEAREST, params, _DIST_LIST_ADAPTER.validate_json
+        )
 
     def get_stop(self, stop_id: str) -> Stop | None:
         """Retrieve details of a specific stop by its ID.
@@ -125,8 +411,11 @@ class PublicTransitClient:
         Returns:
             Stop | None: A Stop object if found, otherwise None.
         """
-        data = self._send_get_request(f"/schedule/stops/{stop_id}")
-        return Stop(**data) if data else None
+        return self._send_cached_request(
+            _EP_STOP_TMPL.format(quote(stop_id, safe="")),
+            None,
+            _OPTIONAL_STOP_ADAPTER.validate_json,
+        )
 
     def get_next_departures(
         self,
@@ -146,20 +435,17 @@ class PublicTransitClient:
         Returns:
             list[Departure]: A list of Departure objects.
         """
-        stop_id = stop.id if isinstance(stop, Stop) else stop
-        params = {"limit": str(limit)}
-        if departure:
-            params["departureDateTime"] = departure.strftime("%Y-%m-%dT%H:%M:%S")
-        if until:
-            params["untilDateTime"] = until.strftime("%Y-%m-%dT%H:%M:%S")
-
-        data = self._send_get_request(f"/schedule/stops/{stop_id}/departures", params)
-        return [Departure(**dep) for dep in data]
+        params = self._build_departures_params(departure, limit, until)
+        body = self._send_get_request_bytes(
+            _EP_DEPARTURES_TMPL.format(quote(_stop_id(stop), safe="")), params
+        )
+        return _DEP_LIST_ADAPTER.validate_json(body)
 
     def get_router_info(self) -> RouterInfo:
         """Retrieve information about the routing API."""
-        data = self._send_get_request("/routing")
-        return RouterInfo(**data)
+        return self._send_cached_request(
+            _EP_ROUTING, None, RouterInfo.model_validate_json
+        )
 
     def get_connections(
         self,
@@ -190,8 +476,8 @@ class PublicTransitClient:
             time_type=time_type,
             query_config=query_config,
         )
-        data = self._send_get_request("/routing/connections", params)
-        return [Connection(**conn) for conn in data]
+        body = self._send_get_request_bytes(_EP_CONNECTIONS, params)
+        return _CONN_LIST_ADAPTER.validate_json(body)
 
     def get_isolines(
         self,
@@ -214,7 +500,110 @@ class PublicTransitClient:
         Returns:
             list[StopConnection]: A list of StopConnection objects representing the reachable areas.
         """
-        params = self._build_params_dict(
+        params = self._build_isolines_params(
+            source, time, time_type, query_config, return_connections
+        )
+        body = self._send_get_request_bytes(_EP_ISOLINES, params)
+        return _STOPCONN_LIST_ADAPTER.validate_json(body)
+
+    def get_isolines_iter(
+        self,
+        source: Stop | Coordinate | str | tuple[float, float],
+        time: datetime | None = None,
+        time_type: TimeType = TimeType.DEPARTURE,
+        query_config: QueryConfig | None = None,
+        return_connections: bool = False,
+    ) -> Iterator[StopConnection]:
+        """Iterate over isolines (areas reachable within a certain time) from a specific stop / location.
+
+        If ijson is installed, the response is parsed incrementally while it is downloaded, so each StopConnection
+        is available as soon as it has been read and the full JSON document is never held in memory. Streaming costs
+        about 1.5 times the CPU time of parsing the whole response at once, so prefer `get_isolines` unless memory or
+        the time to the first result matters.
+
+        Args:
+            source (Stop | Coordinate | str | tuple[float, float]): The starting Stop object, Coordinate object, Stop ID or
+                Coordinates tuple.
+            time (datetime, optional): The time for the isoline calculation. Defaults to None (=now).
+            time_type (TimeType, optional): Whether the time is for departure or arrival. Defaults to DEPARTURE.
+            query_config (QueryConfig, optional): Additional query configuration. Defaults to None.
+            return_connections (bool, optional): Whether to return detailed connections. Defaults to False.
+
+        Returns:
+            Iterator[StopConnection]: The StopConnection objects representing the reachable areas.
+        """
+        params = self._build_isolines_params(
+            source, time, time_type, query_config, return_connections
+        )
+        if ijson is None or self._http is not None:
+            body = self._send_get_request_bytes(_EP_ISOLINES, params)
+            yield from _STOPCONN_LIST_ADAPTER.validate_json(body)
+            return
+
+        response = self._get(_EP_ISOLINES, params, stream=True)
+        try:
+            if response.status_code != 200:
+                body = self._handle_response(response)
+                yield from _STOPCONN_LIST_ADAPTER.validate_json(body)
+                return
+
+            response.raw.decode_content = True
+            for stop_conn in ijson.items(response.raw, "item", use_float=True):
+                yield StopConnection.model_validate(stop_conn)
+        finally:
+            response.close()
+
+    @staticmethod
+    def _build_search_params(
+        query: str, limit: int, search_type: SearchType
+    ) -> dict[str, Any]:
+        return {
+            "query": query,
+            "limit": limit,
+            "searchType": search_type,
+        }
+
+    @staticmethod
+    def _build_nearest_params(
+        coordinate: Coordinate,
+        limit: int,
+        max_distance: int,
+        precision: int | None = None,
+    ) -> dict[str, Any]:
+        latitude, longitude = coordinate.latitude, coordinate.longitude
+        if precision is not None:
+            latitude, longitude = round(latitude, precision), round(
+                longitude, precision
+            )
+
+        return {
+            "latitude": latitude,
+            "longitude": longitude,
+            "limit": limit,
+            "maxDistance": max_distance,
+        }
+
+    @staticmethod
+    def _build_departures_params(
+        departure: datetime | None, limit: int, until: datetime | None
+    ) -> dict[str, Any]:
+        params: dict[str, Any] = {"limit": limit}
+        if departure:
+            params["departureDateTime"] = _format_date_time(departure)
+        if until:
+            params["untilDateTime"] = _format_date_time(until)
+
+        return params
+
+    @staticmethod
+    def _build_isolines_params(
+        source: Stop | Coordinate | str | tuple[float, float],
+        time: datetime | None,
+        time_type: TimeType,
+        query_config: QueryConfig | None,
+        return_connections: bool,
+    ) -> dict[str, Any]:
+        params = PublicTransitClient._build_params_dict(
             source,
             time=time,
             time_type=time_type,
@@ -224,8 +613,7 @@ class PublicTransitClient:
         if return_connections:
             params["returnConnections"] = "true"
 
-        data = self._send_get_request("/routing/isolines", params)
-        return [StopConnection(**stop_conn) for stop_conn in data]
+        return params
 
     @staticmethod
     def _build_params_dict(
@@ -235,55 +623,32 @@ class PublicTransitClient:
         time_type: TimeType | None = None,
         query_config: QueryConfig | None = None,
     ) -> dict[str, Any]:
+        params: dict[str, Any] = {}
+        if time is not None:
+            # without a date time, the API uses its own current time
+            params["dateTime"] = _format_date_time(time)
 
-        if isinstance(source, Stop):
-            source = source.id
-        elif isinstance(source, Coordinate):
-            source = source.to_tuple()
-
-        if isinstance(target, Stop):
-            target = target.id
-        elif isinstance(target, Coordinate):
-            target = target.to_tuple()
-
-        params: dict[str, Any] = {
-            "dateTime": (datetime.now() if time is None else time).strftime(
-                "%Y-%m-%dT%H:%M:%S"
-            ),
-        }
-
-        if isinstance(source, tuple):
-            params["sourceLatitude"] = str(source[0])
-            params["sourceLongitude"] = str(source[1])
-        elif isinstance(source, str):
-            params["sourceStopId"] = source
-
+        _encode_location(params, _SOURCE_KEYS, source)
         if target is not None:
-            if isinstance(target, tuple):
-                params["targetLatitude"] = str(target[0])
-                params["targetLongitude"] = str(target[1])
-            elif isinstance(target, str):
-                params["targetStopId"] = target
+            _encode_location(params, _TARGET_KEYS, target)
 
         if time_type:
-            params["timeType"] = time_type.value
+            params["timeType"] = time_type
 
         if query_config is None:
             return params
 
-        if query_config.max_walking_duration is not None:
-            params["maxWalkingDuration"] = str(query_config.max_walking_duration)
-        if query_config.max_num_transfers is not None:
-            params["maxTransferNumber"] = str(query_config.max_num_transfers)
-        if query_config.max_travel_time is not None:
-            params["maxTravelTime"] = str(query_config.max_travel_time)
-        if query_config.min_transfer_duration is not None:
-            params["minTransferTime"] = str(query_config.min_transfer_duration)
-        if query_config.accessibility is not None:
-            params["wheelchairAccessible"] = str(query_config.accessibility).lower()
-        if query_config.bikes is not None:
-            params["bikesAllowed"] = str(query_config.bikes).lower()
+        params.update(
+            (name, value)
+            for field, name in _QUERY_CONFIG_PARAMS
+            if (value := getattr(query_config, field)) is not None
+        )
+        params.update(
+            (name, "true" if value else "false")
+            for field, name in _QUERY_CONFIG_FLAGS
+            if (value := getattr(query_config, field)) is not None
+        )
         if query_config.travel_modes is not None:
-            params["travelModes"] = [mode.value for mode in query_config.travel_modes]
+            params["travelModes"] = list(query_config.travel_modes)
 
         return params
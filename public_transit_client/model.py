@@ -1,12 +1,96 @@
+import math
+import os
+from dataclasses import dataclass
 from datetime import date, datetime
-from enum import Enum
-from itertools import pairwise
+from enum import StrEnum
+from functools import cached_property, lru_cache
+from typing import Any, Mapping, Self, Sequence
 
-from geopy import distance  # type: ignore
-from pydantic import BaseModel, Field, field_validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    ModelWrapValidatorHandler,
+    PrivateAttr,
+    TypeAdapter,
+    computed_field,
+    field_validator,
+    model_validator,
+)
+from pydantic.dataclasses import dataclass as pydantic_dataclass
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore[assignment]
 
-class SearchType(Enum):
+EARTH_RADIUS_M = 6_371_008.8
+
+
+def _haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+# maximum latitude / longitude difference in degrees (~2 km) up to which the equirectangular approximation is used
+_EQUIRECTANGULAR_MAX_SPAN = 0.02
+
+
+def _equirectangular(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    x = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return EARTH_RADIUS_M * math.sqrt(x * x + y * y)
+
+
+# compiling adds to the import time and the first distance calculation, so it is only done on request
+_JIT_ENV_VAR = "PUBLIC_TRANSIT_CLIENT_JIT"
+
+if os.environ.get(_JIT_ENV_VAR, "").lower() in ("1", "true", "yes"):
+    try:
+        from numba import njit
+    except ImportError as e:
+        raise ImportError(
+            f"numba is required when {_JIT_ENV_VAR} is set, install the jit extra"
+        ) from e
+
+    # compiled on first use, the machine code is cached on disk for later processes
+    _haversine = njit(cache=True, fastmath=True)(_haversine)
+    _equirectangular = njit(cache=True, fastmath=True)(_equirectangular)
+
+
+@lru_cache(maxsize=4096)
+def _haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Calculates the great circle distance in meters between two coordinates in degrees.
+
+    Memoized, since the legs of the connections of a routing result often share their endpoints. Compiled with
+    numba if the PUBLIC_TRANSIT_CLIENT_JIT environment variable is set (jit extra).
+    """
+    return _haversine(lat1, lon1, lat2, lon2)
+
+
+def _require_numpy(feature: str) -> None:
+    if np is None:
+        raise ImportError(
+            f"numpy is required for {feature}, install the speedups extra"
+        )
+
+
+def _haversine_np(lat1: Any, lon1: Any, lat2: Any, lon2: Any) -> Any:
+    """Calculates the element-wise great circle distances in meters between arrays of coordinates in degrees."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+class SearchType(StrEnum):
     """Enum for specifying the type of search."""
 
     EXACT = "EXACT"
@@ -15,21 +99,21 @@ class SearchType(Enum):
     ENDS_WITH = "ENDS_WITH"
 
 
-class LegType(Enum):
+class LegType(StrEnum):
     """Enum for specifying the type of leg in a journey."""
 
     WALK = "WALK"
     ROUTE = "ROUTE"
 
 
-class TimeType(Enum):
+class TimeType(StrEnum):
     """Enum for specifying the type of time defined in a connection query (departure or arrival)."""
 
     DEPARTURE = "DEPARTURE"
     ARRIVAL = "ARRIVAL"
 
 
-class TransportMode(Enum):
+class TransportMode(StrEnum):
     """Enum for specifying the mode of transport."""
 
     BUS = "BUS"
@@ -41,7 +125,31 @@ class TransportMode(Enum):
     FUNICULAR = "FUNICULAR"
 
 
-class APIError(BaseModel):
+class _Model(BaseModel):
+    """Base of all models, which are immutable and can be populated by field name as well as by the API's alias."""
+
+    model_config = ConfigDict(frozen=True, populate_by_name=True)
+
+    def model_copy(
+        self, *, update: Mapping[str, Any] | None = None, deep: bool = False
+    ) -> Self:
+        """Copy the model, dropping cached properties which may no longer match the updated values.
+
+        Args:
+            update (Mapping[str, Any], optional): Values to change in the copy. Defaults to None.
+            deep (bool, optional): Whether to make a deep copy. Defaults to False.
+
+        Returns:
+            Self: The copied model.
+        """
+        copied = super().model_copy(update=update, deep=deep)
+        keep = type(self).model_fields.keys() | (update or {}).keys()
+        for key in copied.__dict__.keys() - keep:
+            del copied.__dict__[key]
+        return copied
+
+
+class APIError(_Model):
     """Model representing an API error.
 
     Attributes:
@@ -59,7 +167,7 @@ class APIError(BaseModel):
     message: str
 
 
-class ScheduleValidity(BaseModel):
+class ScheduleValidity(_Model):
     """Model representing the validity of a schedule.
 
     Attributes:
@@ -82,7 +190,7 @@ class ScheduleValidity(BaseModel):
         return self.start_date <= reference_date <= self.end_date
 
 
-class ScheduleInfo(BaseModel):
+class ScheduleInfo(_Model):
     """Model representing schedule information.
 
     Attributes:
@@ -98,7 +206,7 @@ class ScheduleInfo(BaseModel):
     schedule_validity: ScheduleValidity = Field(alias="scheduleValidity")
 
 
-class RouterInfo(BaseModel):
+class RouterInfo(_Model):
     """Model representing information about the router.
 
     Attributes:
@@ -120,7 +228,7 @@ class RouterInfo(BaseModel):
     supports_travel_modes: bool = Field(alias="supportsTravelModes")
 
 
-class QueryConfig(BaseModel):
+class QueryConfig(_Model):
     """Model representing configuration for a query.
 
     Attributes:
@@ -141,10 +249,16 @@ class QueryConfig(BaseModel):
     bikes: bool | None = None
     travel_modes: list[TransportMode] | None = None
 
+    model_config = ConfigDict(frozen=False)
 
-class Coordinate(BaseModel):
+
+@pydantic_dataclass(frozen=True, slots=True)
+class Coordinate:
     """Model representing geographical coordinates.
 
+    A slotted pydantic dataclass rather than a BaseModel, since routing and isoline results contain a large number of
+    coordinates.
+
     Attributes:
         latitude (float): The latitude of the coordinate.
         longitude (float): The longitude of the coordinate.
@@ -153,20 +267,68 @@ class Coordinate(BaseModel):
     latitude: float
     longitude: float
 
-    def distance_to(self, other: "Coordinate") -> float:
+    def distance_to(
+        self, other: "Coordinate", accurate: bool = False, *, fast: bool = False
+    ) -> float:
         """Calculate the distance to another Coordinate.
 
+        By default, the great circle (haversine) distance is returned, which deviates less than 0.5% from the
+        geodesic distance on the WGS-84 ellipsoid.
+
         Args:
             other (Coordinate): The other coordinate to calculate distance to.
+            accurate (bool, optional): Calculate the geodesic distance with geopy instead, which is accurate to the
+                submeter but considerably slower. Defaults to False.
+            fast (bool, optional): Use the cheaper equirectangular approximation for coordinates less than about
+                2 km apart, which differs from the great circle distance by centimeters at that range. Coordinates
+                further apart still use the great circle distance. Defaults to False.
 
         Returns:
             float: The distance in meters.
         """
-        return float(
-            distance.distance(
-                (self.latitude, self.longitude),
-                (other.latitude, other.longitude),
-            ).meters
+        if accurate:
+            from geopy import distance  # type: ignore
+
+            return float(
+                distance.distance(
+                    (self.latitude, self.longitude),
+                    (other.latitude, other.longitude),
+                ).meters
+            )
+        if (
+            fast
+            and abs(self.latitude - other.latitude) < _EQUIRECTANGULAR_MAX_SPAN
+            and abs(self.longitude - other.longitude) < _EQUIRECTANGULAR_MAX_SPAN
+        ):
+            return _equirectangular(
+                self.latitude, self.longitude, other.latitude, other.longitude
+            )
+        return _haversine_m(
+            self.latitude, self.longitude, other.latitude, other.longitude
+        )
+
+    @classmethod
+    def pairwise_haversine(cls, lats1: Any, lons1: Any, lats2: Any, lons2: Any) -> Any:
+        """Calculate the great circle distances between many pairs of coordinates at once.
+
+        Requires numpy. Considerably faster than calling distance_to per pair for more than about a hundred pairs,
+        at the cost of the spherical approximation (error below 0.5%).
+
+        Args:
+            lats1 (array-like): The latitudes of the first coordinates in degrees.
+            lons1 (array-like): The longitudes of the first coordinates in degrees.
+            lats2 (array-like): The latitudes of the second coordinates in degrees.
+            lons2 (array-like): The longitudes of the second coordinates in degrees.
+
+        Returns:
+            numpy.ndarray: The distances in meters.
+        """
+        _require_numpy("pairwise_haversine")
+        return _haversine_np(
+            np.asarray(lats1, dtype=float),
+            np.asarray(lons1, dtype=float),
+            np.asarray(lats2, dtype=float),
+            np.asarray(lons2, dtype=float),
         )
 
     def to_tuple(self) -> tuple[float, float]:
@@ -178,7 +340,7 @@ class Coordinate(BaseModel):
         return self.latitude, self.longitude
 
 
-class Stop(BaseModel):
+class Stop(_Model):
     """Model representing a public transport stop.
 
     Attributes:
@@ -191,8 +353,17 @@ class Stop(BaseModel):
     name: str
     coordinate: Coordinate = Field(alias="coordinates")
 
+    def __eq__(self, other: object) -> bool:
+        """Stops are equal if they have the same ID, which is unique within a schedule."""
+        if not isinstance(other, Stop):
+            return NotImplemented
+        return self.id == other.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
 
-class Route(BaseModel):
+
+class Route(_Model):
     """Model representing a public transport route.
 
     Attributes:
@@ -210,7 +381,7 @@ class Route(BaseModel):
     transport_mode_description: str = Field(alias="transportModeDescription")
 
 
-class StopTime(BaseModel):
+class StopTime(_Model):
     """Model representing a stop time for a particular route.
 
     Attributes:
@@ -224,29 +395,95 @@ class StopTime(BaseModel):
     departure_time: datetime = Field(alias="departureTime")
 
 
-class Trip(BaseModel):
+_STOP_TIME_LIST_ADAPTER = TypeAdapter(list[StopTime])
+
+
+class Trip(_Model):
     """Model representing a public transport trip.
 
     Attributes:
         head_sign (str): The head sign of the trip.
         route (Route): The route associated with the trip.
-        stop_times (list[StopTime]): A list of stop times for the trip.
+        stop_times (list[StopTime]): A list of stop times for the trip, validated on first access.
         bikes_allowed (bool): Indicates if bikes are allowed on the trip.
         wheelchair_accessible (bool): Indicates if the trip is wheelchair accessible.
     """
 
     head_sign: str = Field(alias="headSign")
     route: Route
-    stop_times: list[StopTime] = Field(alias="stopTimes")
     bikes_allowed: bool = Field(alias="bikesAllowed")
     wheelchair_accessible: bool = Field(alias="wheelchairAccessible")
+    _raw_stop_times: list[Any] = PrivateAttr(default_factory=list)
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def _keep_raw_stop_times(
+        cls, data: Any, handler: ModelWrapValidatorHandler[Self]
+    ) -> Self:
+        """Sets the stop times aside unvalidated, they are only validated when first read."""
+        raw_stop_times = None
+        if isinstance(data, dict):
+            data = dict(data)
+            raw_stop_times = data.pop("stopTimes", None)
+            raw_stop_times = data.pop("stop_times", raw_stop_times)
+        trip = handler(data)
+        if raw_stop_times:
+            trip._raw_stop_times = list(raw_stop_times)
+        return trip
+
+    @computed_field(alias="stopTimes")  # type: ignore[prop-decorator]
+    @cached_property
+    def stop_times(self) -> list[StopTime]:
+        """Get the stop times of the trip.
+
+        Trips of routing results carry all their stop times, but most callers never look at them, so they are only
+        validated when first read.
+
+        Returns:
+            list[StopTime]: The stop times of the trip.
+        """
+        return _STOP_TIME_LIST_ADAPTER.validate_python(self._raw_stop_times)
+
+    @cached_property
+    def _stop_ids(self) -> list[str]:
+        """Gets the stop IDs of the trip in order, without validating stop times which are still plain JSON."""
+        if "stop_times" not in self.__dict__:
+            stop_ids = []
+            for stop_time in self._raw_stop_times:
+                stop = stop_time.get("stop") if isinstance(stop_time, dict) else None
+                if not isinstance(stop, dict) or not isinstance(stop.get("id"), str):
+                    break
+                stop_ids.append(stop["id"])
+            else:
+                return stop_ids
+        return [stop_time.stop.id for stop_time in self.stop_times]
+
+    @cached_property
+    def _stop_index(self) -> dict[str, int] | None:
+        """Maps the stop IDs to their position in the trip, None if the trip visits a stop more than once."""
+        stop_ids = self._stop_ids
+        stop_index = {stop_id: i for i, stop_id in enumerate(stop_ids)}
+        return stop_index if len(stop_index) == len(stop_ids) else None
+
+    def __eq__(self, other: object) -> bool:
+        # compare the validated stop times, the raw ones may be JSON or model instances for the same trip
+        if not isinstance(other, Trip):
+            return NotImplemented
+        return (
+            self.head_sign == other.head_sign
+            and self.route == other.route
+            and self.bikes_allowed == other.bikes_allowed
+            and self.wheelchair_accessible == other.wheelchair_accessible
+            and self.stop_times == other.stop_times
+        )
 
-    @field_validator("stop_times", mode="before")
-    def _set_stop_times_not_none(cls, v: list[StopTime] | None) -> list[StopTime]:
-        return v or []
+    def __hash__(self) -> int:
+        return hash(
+            (self.head_sign, self.route, self.bikes_allowed, self.wheelchair_accessible)
+        )
 
 
-class Departure(BaseModel):
+class Departure(_Model):
     """Model representing a departure event.
 
     Attributes:
@@ -258,7 +495,7 @@ class Departure(BaseModel):
     trip: Trip
 
 
-class Leg(BaseModel):
+class Leg(_Model):
     """Model representing a leg of a journey.
 
     Attributes:
@@ -281,43 +518,45 @@ class Leg(BaseModel):
     arrival_time: datetime = Field(alias="arrivalTime")
     trip: Trip | None = None
 
-    @property
+    @cached_property
     def duration(self) -> int:
         """Calculate the duration of the leg in seconds.
 
         Returns:
             int: The duration in seconds.
         """
-        return (self.arrival_time - self.departure_time).seconds
+        return int((self.arrival_time - self.departure_time).total_seconds())
 
-    @property
+    @cached_property
     def distance(self) -> float:
         """Calculate the distance of the leg.
 
+        Walking legs are short, so their distance is calculated with the equirectangular approximation.
+
         Returns:
             float: The distance in meters.
         """
-        return self.from_coordinate.distance_to(self.to_coordinate)
+        return self.from_coordinate.distance_to(self.to_coordinate, fast=self.is_walk)
 
-    @property
+    @cached_property
     def is_walk(self) -> bool:
         """Check if the leg is a walking leg.
 
         Returns:
             bool: True if the leg is a walking leg, False otherwise.
         """
-        return self.type == LegType.WALK
+        return self.type is LegType.WALK
 
-    @property
+    @cached_property
     def is_route(self) -> bool:
         """Check if the leg is a route leg.
 
         Returns:
             bool: True if the leg is a route leg, False otherwise.
         """
-        return self.type == LegType.ROUTE
+        return self.type is LegType.ROUTE
 
-    @property
+    @cached_property
     def num_stops(self) -> int:
         """Calculate the number of stops between the starting and ending stops of the leg.
 
@@ -325,27 +564,52 @@ class Leg(BaseModel):
             int: The number of stops.
 
         Raises:
-            ValueError: If from_stop or to_stop is not found in the trip.
+            ValueError: If from_stop or to_stop is not found in the trip, or to_stop comes before from_stop.
         """
         if self.trip is None or not self.is_route:
             return 0
+        if self.from_stop is None or self.to_stop is None:
+            raise ValueError("from_stop or to_stop not found in trip")
+        if self.from_stop.id == self.to_stop.id:
+            return 0
 
-        # get index of from_stop and to_stop
-        from_stop_index = None
-        to_stop_index = None
-        for i, stop_time in enumerate(self.trip.stop_times):
-            if stop_time.stop == self.from_stop:
-                from_stop_index = i
-            if stop_time.stop == self.to_stop:
-                to_stop_index = i
-                break
+        from_stop_index: int | None = None
+        to_stop_index: int | None = None
+        stop_index = self.trip._stop_index
+        if stop_index is not None:
+            from_stop_index = stop_index.get(self.from_stop.id)
+            to_stop_index = stop_index.get(self.to_stop.id)
+        else:
+            # the trip passes a stop more than once, use the last visit of from_stop before the first visit of to_stop
+            for i, stop_id in enumerate(self.trip._stop_ids):
+                if stop_id == self.from_stop.id:
+                    from_stop_index = i
+                if stop_id == self.to_stop.id:
+                    to_stop_index = i
+                    break
 
         if from_stop_index is None or to_stop_index is None:
             raise ValueError("from_stop or to_stop not found in trip")
+        if to_stop_index < from_stop_index:
+            raise ValueError("to_stop comes before from_stop in trip")
         return to_stop_index - from_stop_index
 
 
-class Connection(BaseModel):
+@dataclass(frozen=True, slots=True)
+class _ConnectionStats:
+    """Aggregates of the legs of a connection, collected in a single pass."""
+
+    walk_duration: int = 0
+    walk_distance: float = 0.0
+    route_duration: int = 0
+    route_distance: float = 0.0
+    num_route_legs: int = 0
+    num_same_station_transfers: int = 0
+    first_route_leg_index: int | None = None
+    last_route_leg_index: int | None = None
+
+
+class Connection(_Model):
     """Model representing a journey connection consisting of multiple legs.
 
     Attributes:
@@ -378,33 +642,27 @@ class Connection(BaseModel):
         """
         return self.legs[-1]
 
-    @property
+    @cached_property
     def first_route_leg(self) -> Leg | None:
         """Get the first route leg of the connection.
 
         Returns:
             Leg | None: The first route leg, or None if no route legs exist.
         """
-        for leg in self.legs:
-            if leg.is_route:
-                return leg
-
-        return None
+        index = self._stats.first_route_leg_index
+        return None if index is None else self.legs[index]
 
-    @property
+    @cached_property
     def last_route_leg(self) -> Leg | None:
         """Get the last route leg of the connection.
 
         Returns:
             Leg | None: The last route leg, or None if no route legs exist.
         """
-        for leg in reversed(self.legs):
-            if leg.is_route:
-                return leg
-
-        return None
+        index = self._stats.last_route_leg_index
+        return None if index is None else self.legs[index]
 
-    @property
+    @cached_property
     def first_stop(self) -> Stop | None:
         """Get the first stop of the connection.
 
@@ -414,7 +672,7 @@ class Connection(BaseModel):
         first_route_leg = self.first_route_leg
         return first_route_leg.from_stop if first_route_leg else None
 
-    @property
+    @cached_property
     def last_stop(self) -> Stop | None:
         """Get the last stop of the connection.
 
@@ -478,16 +736,52 @@ class Connection(BaseModel):
         """
         return self.last_leg.to_stop
 
-    @property
+    @cached_property
     def duration(self) -> int:
         """Calculate the duration of the connection in seconds.
 
         Returns:
             int: The duration in seconds.
         """
-        return (self.arrival_time - self.departure_time).seconds
+        return int((self.arrival_time - self.departure_time).total_seconds())
+
+    @cached_property
+    def _stats(self) -> _ConnectionStats:
+        """Collects the duration and distance aggregates of all legs in a single pass."""
+        walk_duration = route_duration = 0
+        walk_distance = route_distance = 0.0
+        num_route_legs = num_same_station_transfers = 0
+        first_route_leg_index: int | None = None
+        last_route_leg_index: int | None = None
+        prev_is_route = False
+        for i, leg in enumerate(self.legs):
+            if leg.is_route:
+                route_duration += leg.duration
+                route_distance += leg.distance
+                num_route_legs += 1
+                if first_route_leg_index is None:
+                    first_route_leg_index = i
+                last_route_leg_index = i
+                if prev_is_route:
+                    num_same_station_transfers += 1
+                prev_is_route = True
+            else:
+                walk_duration += leg.duration
+                walk_distance += leg.distance
+                prev_is_route = False
+
+        return _ConnectionStats(
+            walk_duration,
+            walk_distance,
+            route_duration,
+            route_distance,
+            num_route_legs,
+            num_same_station_transfers,
+            first_route_leg_index,
+            last_route_leg_index,
+        )
 
-    @property
+    @cached_property
     def travel_duration(self) -> int:
         """Calculate the travel duration of the connection in seconds.
 
@@ -496,9 +790,9 @@ class Connection(BaseModel):
         Returns:
             int: The travel duration in seconds.
         """
-        return sum(leg.duration for leg in self.legs)
+        return self._stats.walk_duration + self._stats.route_duration
 
-    @property
+    @cached_property
     def travel_distance(self) -> float:
         """Calculate the travel distance of the connection.
 
@@ -507,9 +801,9 @@ class Connection(BaseModel):
         Returns:
             float: The travel distance in meters.
         """
-        return sum(leg.distance for leg in self.legs)
+        return self._stats.walk_distance + self._stats.route_distance
 
-    @property
+    @cached_property
     def bee_line_distance(self) -> float:
         """Calculate the bee line distance of the connection.
 
@@ -520,43 +814,43 @@ class Connection(BaseModel):
         """
         return self.from_coordinate.distance_to(self.to_coordinate)
 
-    @property
+    @cached_property
     def walk_distance(self) -> float:
         """Calculate the walking distance of the connection.
 
         Returns:
             float: The total walking distance in meters.
         """
-        return sum(leg.distance for leg in self.legs if leg.is_walk)
+        return self._stats.walk_distance
 
-    @property
+    @cached_property
     def route_distance(self) -> float:
         """Calculate the route distance of the connection.
 
         Returns:
             float: The total distance travelled on route legs in meters.
         """
-        return sum(leg.distance for leg in self.legs if leg.is_route)
+        return self._stats.route_distance
 
-    @property
+    @cached_property
     def walk_duration(self) -> int:
         """Calculate the walking duration of the connection in seconds.
 
         Returns:
             int: The total walking duration in seconds.
         """
-        return sum(leg.duration for leg in self.legs if leg.is_walk)
+        return self._stats.walk_duration
 
-    @property
+    @cached_property
     def route_duration(self) -> int:
         """Calculate the route duration of the connection in seconds.
 
         Returns:
             int: The total duration travelled on route legs in seconds.
         """
-        return sum(leg.duration for leg in self.legs if leg.is_route)
+        return self._stats.route_duration
 
-    @property
+    @cached_property
     def num_transfers(self) -> int:
         """Calculate the number of transfers in the connection.
 
@@ -565,9 +859,9 @@ class Connection(BaseModel):
         Returns:
             int: The number of transfers.
         """
-        return sum(1 for leg in self.legs if leg.is_route) - 1
+        return self._stats.num_route_legs - 1
 
-    @property
+    @cached_property
     def num_same_station_transfers(self) -> int:
         """Calculate the number of same station transfers in the connection.
 
@@ -577,13 +871,9 @@ class Connection(BaseModel):
         Returns:
             int: The number of same station transfers.
         """
-        return sum(
-            1
-            for prev_leg, current_leg in pairwise(self.legs)
-            if prev_leg.is_route and current_leg.is_route
-        )
+        return self._stats.num_same_station_transfers
 
-    @property
+    @cached_property
     def num_stops(self) -> int:
         """Calculate the number of stops in the connection.
 
@@ -599,10 +889,10 @@ class Connection(BaseModel):
         Returns:
             bool: True if the connection spans multiple dates, False otherwise.
         """
-        return self.departure_time.date() != self.arrival_time.date()
+        return self.departure_time.toordinal() != self.arrival_time.toordinal()
 
 
-class StopConnection(BaseModel):
+class StopConnection(_Model):
     """Model representing a connection to a stop.
 
     Attributes:
@@ -616,7 +906,7 @@ class StopConnection(BaseModel):
     connection: Connection | None = None
 
 
-class DistanceToStop(BaseModel):
+class DistanceToStop(_Model):
     """Model representing the distance to a stop.
 
     Attributes:
@@ -626,3 +916,54 @@ class DistanceToStop(BaseModel):
 
     stop: Stop
     distance: float
+
+
+def stops_to_soa(stops: Sequence[Stop]) -> tuple[Any, Any, Any]:
+    """Convert stops into a structure of arrays for vectorized calculations.
+
+    Requires numpy.
+
+    Args:
+        stops (Sequence[Stop]): The stops to convert.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]: The stop IDs (object array), latitudes and longitudes.
+    """
+    _require_numpy("stops_to_soa")
+    n = len(stops)
+    ids = np.fromiter((stop.id for stop in stops), dtype=object, count=n)
+    lats = np.fromiter((stop.coordinate.latitude for stop in stops), float, n)
+    lons = np.fromiter((stop.coordinate.longitude for stop in stops), float, n)
+    return ids, lats, lons
+
+
+def nearest_by_haversine(
+    origin: Coordinate, stops: Sequence[Stop], k: int
+) -> list[DistanceToStop]:
+    """Find the k stops closest to a coordinate among the given stops.
+
+    Requires numpy. Ranks the stops locally by great circle distance in a single vectorized sweep, only the k
+    closest are sorted.
+
+    Args:
+        origin (Coordinate): The coordinate to measure the distances from.
+        stops (Sequence[Stop]): The candidate stops.
+        k (int): The maximum number of stops to return.
+
+    Returns:
+        list[DistanceToStop]: The k closest stops, ordered by ascending distance.
+    """
+    _require_numpy("nearest_by_haversine")
+    if k <= 0 or not stops:
+        return []
+
+    _, lats, lons = stops_to_soa(stops)
+    distances = _haversine_np(origin.latitude, origin.longitude, lats, lons)
+    if k < len(stops):
+        candidates = np.argpartition(distances, k - 1)[:k]
+    else:
+        candidates = np.arange(len(stops))
+    nearest = candidates[np.argsort(distances[candidates], kind="stable")]
+    return [
+        DistanceToStop(stop=stops[i], distance=float(distances[i])) for i in nearest
+    ]
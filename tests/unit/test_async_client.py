@@ -0,0 +1,183 @@
+import asyncio
+import json
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+
+from public_transit_client.async_client import AsyncPublicTransitClient  # noqa: E402
+from public_transit_client.client import PublicTransitClientException  # noqa: E402
+from public_transit_client.model import (  # noqa: E402
+    Connection,
+    QueryConfig,
+    TransportMode,
+)
+
+pytestmark = pytest.mark.unit
+
+_TIME = datetime(2024, 8, 18, 17, 0)
+
+_CONNECTION_PAYLOAD = {
+    "legs": [
+        {
+            "from": {"latitude": 36.0, "longitude": -116.0},
+            "to": {"latitude": 37.0, "longitude": -117.0},
+            "type": "ROUTE",
+            "departureTime": "2024-08-18T17:34:03",
+            "arrivalTime": "2024-08-18T18:00:00",
+        }
+    ]
+}
+_API_ERROR_PAYLOAD = {
+    "timestamp": "2024-08-18T17:34:03.820509687",
+    "status": 404,
+    "error": "Not Found",
+    "path": "/schedule/stops/NOT_EXISTING",
+    "message": "The requested stop with ID 'NOT_EXISTING' was not found.",
+}
+_API_ERROR_MATCH = (
+    r"API Error 404: The requested stop with ID 'NOT_EXISTING' was not found\."
+)
+
+
+@pytest.fixture
+def set_response(monkeypatch):
+    def _set_response(status=200, json_data=None):
+        body = json.dumps(json_data).encode()
+
+        async def read():
+            return body
+
+        response = SimpleNamespace(status=status, read=read)
+        mock_get = MagicMock()
+        mock_get.return_value.__aenter__.return_value = response
+        monkeypatch.setattr(aiohttp.ClientSession, "get", mock_get)
+        return mock_get
+
+    return _set_response
+
+
+def test_send_get_request_success(set_response):
+    async def run():
+        async with AsyncPublicTransitClient(host="http://fakehost") as client:
+            return await client._send_get_request_bytes("/fake_endpoint")
+
+    set_response(status=200, json_data={"key": "value"})
+    response = asyncio.run(run())
+
+    assert response == b'{"key": "value"}'
+
+
+def test_send_get_request_url_formation(set_response):
+    async def run():
+        async with AsyncPublicTransitClient(host="http://fakehost") as client:
+            return await client._send_get_request_bytes(
+                "/fake_endpoint", {"limit": 5, "travelModes": ["BUS", "RAIL"]}
+            )
+
+    mock_get = set_response(status=200, json_data={})
+    asyncio.run(run())
+
+    mock_get.assert_called_once_with(
+        "http://fakehost/fake_endpoint",
+        params=[("limit", "5"), ("travelModes", "BUS"), ("travelModes", "RAIL")],
+    )
+
+
+def test_send_get_request_error(set_response):
+    async def run():
+        async with AsyncPublicTransitClient(host="http://fakehost") as client:
+            return await client._send_get_request_bytes("/fake_endpoint")
+
+    set_response(status=404, json_data=_API_ERROR_PAYLOAD)
+    with pytest.raises(PublicTransitClientException, match=_API_ERROR_MATCH):
+        asyncio.run(run())
+
+
+def test_get_connections_concurrently(set_response):
+    async def run():
+        async with AsyncPublicTransitClient(host="http://fakehost") as client:
+            return await asyncio.gather(
+                *[
+                    client.get_connections(
+                        source=source,
+                        target="BULLFROG",
+                        time=_TIME,
+                        query_config=QueryConfig(
+                            travel_modes=[TransportMode.BUS, TransportMode.RAIL]
+                        ),
+                    )
+                    for source in ("NANAA", "STAGECOACH")
+                ]
+            )
+
+    mock_get = set_response(
+        status=200,
+        json_data=[_CONNECTION_PAYLOAD],
+    )
+    results = asyncio.run(run())
+
+    assert len(results) == 2
+    assert all(isinstance(connections[0], Connection) for connections in results)
+    params = mock_get.call_args.kwargs["params"]
+    assert ("travelModes", "BUS") in params
+    assert ("travelModes", "RAIL") in params
+
+
+def test_get_connections_matrix(set_response):
+    async def run():
+        async with AsyncPublicTransitClient(host="http://fakehost") as client:
+            return await client.get_connections_matrix(
+                sources=["NANAA", "STAGECOACH"],
+                targets=["BULLFROG", "AMV", "FUR_CREEK_RES"],
+                time=_TIME,
+            )
+
+    mock_get = set_response(
+        status=200,
+        json_data=[_CONNECTION_PAYLOAD],
+    )
+    matrix = asyncio.run(run())
+
+    assert len(matrix) == 2
+    assert all(len(row) == 3 for row in matrix)
+    assert isinstance(matrix[1][2][0], Connection)
+    assert mock_get.call_count == 6
+
+
+def test_get_connections_matrix_cancels_pending_queries(monkeypatch):
+    cancelled = 0
+
+    async def read_error():
+        return json.dumps(_API_ERROR_PAYLOAD).encode()
+
+    async def read_forever():
+        nonlocal cancelled
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled += 1
+            raise
+
+    mock_get = MagicMock()
+    mock_get.return_value.__aenter__.side_effect = [
+        SimpleNamespace(status=404, read=read_error),
+        *[SimpleNamespace(status=200, read=read_forever) for _ in range(5)],
+    ]
+    monkeypatch.setattr(aiohttp.ClientSession, "get", mock_get)
+
+    async def run():
+        async with AsyncPublicTransitClient(host="http://fakehost") as client:
+            with pytest.raises(PublicTransitClientException, match=_API_ERROR_MATCH):
+                await client.get_connections_matrix(
+                    sources=["NANAA", "STAGECOACH"],
+                    targets=["BULLFROG", "AMV", "FUR_CREEK_RES"],
+                    time=_TIME,
+                )
+            # checked before asyncio.run cancels any leftover tasks on shutdown
+            return cancelled
+
+    assert asyncio.run(run()) == 5
@@ -1,9 +1,13 @@
-from datetime import datetime
-from unittest.mock import Mock, patch
+import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
 
 import pytest
-from requests import Response
 
+import public_transit_client.client as client_module
 from public_transit_client.client import (
     PublicTransitClient,
     PublicTransitClientException,
@@ -12,229 +16,393 @@ from public_transit_client.model import (
     Connection,
     Coordinate,
     Departure,
+    DistanceToStop,
+    QueryConfig,
     SearchType,
     Stop,
     StopConnection,
 )
 
+pytestmark = pytest.mark.unit
+
+_TIME = datetime(2024, 8, 18, 17, 0)
+_COORDINATE = Coordinate(latitude=36.0, longitude=-116.0)
+
+_STOP_PAYLOAD = {
+    "id": "1",
+    "name": "Stop 1",
+    "coordinates": {"latitude": 36.0, "longitude": -116.0},
+}
+_NANAA_PAYLOAD = {
+    "id": "NANAA",
+    "name": "Stop NANAA",
+    "coordinates": {"latitude": 36.0, "longitude": -116.0},
+}
+_LEG_PAYLOAD = {
+    "from": {"latitude": 36.0, "longitude": -116.0},
+    "to": {"latitude": 37.0, "longitude": -117.0},
+    "type": "ROUTE",
+    "departureTime": "2024-08-18T17:34:03",
+    "arrivalTime": "2024-08-18T18:00:00",
+}
+_DEPARTURE_PAYLOAD = {
+    "stopTime": {
+        "stop": _STOP_PAYLOAD,
+        "arrivalTime": "2024-08-18T17:34:03",
+        "departureTime": "2024-08-18T17:45:00",
+    },
+    "trip": {
+        "headSign": "Head Sign",
+        "route": {
+            "id": "1",
+            "name": "Route 1",
+            "shortName": "R1",
+            "transportMode": "BUS",
+            "transportModeDescription": "More Bus Details",
+        },
+        "stopTimes": [],
+        "bikesAllowed": True,
+        "wheelchairAccessible": True,
+    },
+}
+_CONNECTION_PAYLOAD = {"legs": [_LEG_PAYLOAD]}
+_STOP_CONNECTION_PAYLOAD = {"stop": _STOP_PAYLOAD, "connectingLeg": _LEG_PAYLOAD}
+_API_ERROR_PAYLOAD = {
+    "timestamp": "2024-08-18T17:34:03.820509687",
+    "status": 404,
+    "error": "Not Found",
+    "path": "/schedule/stops/NOT_EXISTING",
+    "message": "The requested stop with ID 'NOT_EXISTING' was not found.",
+}
+_STOP = Stop.model_validate(_STOP_PAYLOAD)
+_NANAA = Stop.model_validate(_NANAA_PAYLOAD)
+_DEPARTURE = Departure.model_validate(_DEPARTURE_PAYLOAD)
+_CONNECTION = Connection.model_validate(_CONNECTION_PAYLOAD)
+_STOP_CONNECTION = StopConnection.model_validate(_STOP_CONNECTION_PAYLOAD)
+_API_ERROR_MATCH = (
+    r"API Error 404: The requested stop with ID 'NOT_EXISTING' was not found\."
+)
+
+
+def _dump(value):
+    if isinstance(value, list):
+        return [item.model_dump() for item in value]
+    return value.model_dump()
+
 
-@pytest.fixture(scope="module")
+@pytest.fixture
 def client():
-    return PublicTransitClient(host="http://fakehost")
+    with PublicTransitClient(host="http://fakehost", cache_size=0) as client:
+        yield client
 
 
-@pytest.mark.unit
-def mock_response(status=200, json_data=None):
-    mock_resp = Mock(spec=Response)
-    mock_resp.status_code = status
-    mock_resp.json.return_value = json_data
-    return mock_resp
+def test_context_manager_closes_session():
+    with patch("requests.Session.close") as mock_close:
+        with PublicTransitClient(host="http://fakehost") as client:
+            assert isinstance(client, PublicTransitClient)
 
+        mock_close.assert_called_once()
 
-@pytest.mark.unit
-def test_send_get_request_success(client):
-    with patch("requests.get") as mock_get:
-        mock_get.return_value = mock_response(status=200, json_data={"key": "value"})
 
-        response = client._send_get_request("/fake_endpoint")
+@pytest.mark.parametrize(
+    "status, json_data, expectation",
+    [
+        (200, {"key": "value"}, nullcontext(b'{"key": "value"}')),
+        (
+            404,
+            _API_ERROR_PAYLOAD,
+            pytest.raises(PublicTransitClientException, match=_API_ERROR_MATCH),
+        ),
+    ],
+    ids=["success", "error"],
+)
+def test_send_get_request_bytes(client, requests_mock, status, json_data, expectation):
+    requests_mock.get(
+        "http://fakehost/fake_endpoint", status_code=status, json=json_data
+    )
 
-        assert response == {"key": "value"}
-        mock_get.assert_called_once_with("http://fakehost/fake_endpoint", params=None)
+    with expectation as expected:
+        assert client._send_get_request_bytes("/fake_endpoint") == expected
 
 
-@pytest.mark.unit
-def test_send_get_request_error(client):
-    with patch("requests.get") as mock_get:
-        mock_get.return_value = mock_response(
-            status=404,
-            json_data={
-                "timestamp": "2024-08-18T17:34:03.820509687",
-                "status": 404,
-                "error": "Not Found",
-                "path": "/schedule/stops/NOT_EXISTING",
-                "message": "The requested stop with ID 'NOT_EXISTING' was not found.",
-            },
-        )
+def test_send_get_request_url_formation(client, requests_mock):
+    requests_mock.get("http://fakehost/fake_endpoint", json={})
 
-        with pytest.raises(PublicTransitClientException) as exc_info:
-            client._send_get_request("/fake_endpoint")
+    client._send_get_request_bytes(
+        "/fake_endpoint", {"limit": 5, "travelModes": ["BUS", "RAIL"]}
+    )
 
-        assert (
-            "API Error 404: The requested stop with ID 'NOT_EXISTING' was not found."
-            in str(exc_info.value)
-        )
-        mock_get.assert_called_once_with("http://fakehost/fake_endpoint", params=None)
-
-
-@pytest.mark.unit
-def test_search_stops(client):
-    with patch("requests.get") as mock_get:
-        mock_get.return_value = mock_response(
-            status=200,
-            json_data=[
-                {
-                    "id": "1",
-                    "name": "Stop 1",
-                    "coordinates": {"latitude": 36.0, "longitude": -116.0},
-                }
-            ],
-        )
+    assert requests_mock.call_count == 1
+    assert (
+        requests_mock.last_request.url
+        == "http://fakehost/fake_endpoint?limit=5&travelModes=BUS&travelModes=RAIL"
+    )
 
-        stops = client.search_stops(query="e", limit=5, search_type=SearchType.CONTAINS)
-
-        assert isinstance(stops, list)
-        assert len(stops) == 1
-        assert stops[0].id == "1"
-        assert isinstance(stops[0], Stop)
-
-
-@pytest.mark.unit
-def test_nearest_stops(client):
-    with patch("requests.get") as mock_get:
-        mock_get.return_value = mock_response(
-            status=200,
-            json_data=[
-                {
-                    "stop": {
-                        "id": "1",
-                        "name": "Stop 1",
-                        "coordinates": {"latitude": 36.0, "longitude": -116.0},
-                    },
-                    "distance": 500,
-                }
-            ],
-        )
 
-        coordinate = Coordinate(latitude=36, longitude=-116)
-        stops = client.nearest_stops(
-            coordinate=coordinate, limit=3, max_distance=100000
+def test_send_get_request_low_overhead():
+    with (
+        PublicTransitClient(host="http://fakehost", low_overhead=True) as client,
+        patch("urllib3.PoolManager.request") as mock_request,
+    ):
+        mock_request.return_value = SimpleNamespace(
+            status=200, data=b'{"key": "value"}'
         )
 
-        assert isinstance(stops, list)
-        assert len(stops) == 1
-        assert stops[0].distance == 500
-        assert isinstance(stops[0].stop, Stop)
-
-
-@pytest.mark.unit
-def test_get_stop(client):
-    with patch("requests.get") as mock_get:
-        mock_get.return_value = mock_response(
-            status=200,
-            json_data={
-                "id": "NANAA",
-                "name": "Stop NANAA",
-                "coordinates": {"latitude": 36.0, "longitude": -116.0},
-            },
+        response = client._send_get_request_bytes(
+            "/fake_endpoint", {"limit": 5, "travelModes": ["BUS", "RAIL"]}
         )
 
-        stop = client.get_stop(stop_id="NANAA")
-
-        assert stop is not None
-        assert stop.id == "NANAA"
-        assert isinstance(stop, Stop)
-
-
-@pytest.mark.unit
-def test_get_next_departures(client):
-    with patch("requests.get") as mock_get:
-        mock_get.return_value = mock_response(
-            status=200,
-            json_data=[
-                {
-                    "stopTime": {
-                        "stop": {
-                            "id": "1",
-                            "name": "Stop 1",
-                            "coordinates": {"latitude": 36.0, "longitude": -116.0},
-                        },
-                        "arrivalTime": "2024-08-18T17:34:03",
-                        "departureTime": "2024-08-18T17:45:00",
-                    },
-                    "trip": {
-                        "headSign": "Head Sign",
-                        "route": {
-                            "id": "1",
-                            "name": "Route 1",
-                            "shortName": "R1",
-                            "transportMode": "BUS",
-                            "transportModeDescription": "More Bus Details",
-                        },
-                        "stopTimes": [],
-                        "bikesAllowed": True,
-                        "wheelchairAccessible": True,
-                    },
-                }
-            ],
+        assert response == b'{"key": "value"}'
+        mock_request.assert_called_once_with(
+            "GET",
+            "http://fakehost/fake_endpoint",
+            fields=[("limit", "5"), ("travelModes", "BUS"), ("travelModes", "RAIL")],
         )
 
-        departures = client.get_next_departures(
-            stop="NANAA", departure=datetime(2024, 8, 18, 17, 0)
-        )
 
-        assert isinstance(departures, list)
-        assert len(departures) == 1
-        assert isinstance(departures[0], Departure)
-
-
-@pytest.mark.unit
-def test_get_connections(client):
-    with patch("requests.get") as mock_get:
-        mock_get.return_value = mock_response(
-            status=200,
-            json_data=[
-                {
-                    "legs": [
-                        {
-                            "from": {"latitude": 36.0, "longitude": -116.0},
-                            "to": {"latitude": 37.0, "longitude": -117.0},
-                            "type": "ROUTE",
-                            "departureTime": "2024-08-18T17:34:03",
-                            "arrivalTime": "2024-08-18T18:00:00",
-                        }
-                    ]
-                }
-            ],
+def test_send_get_request_low_overhead_error():
+    with (
+        PublicTransitClient(host="http://fakehost", low_overhead=True) as client,
+        patch("urllib3.PoolManager.request") as mock_request,
+    ):
+        mock_request.return_value = SimpleNamespace(
+            status=404,
+            reason="Not Found",
+            data=json.dumps(_API_ERROR_PAYLOAD).encode(),
         )
 
-        connections = client.get_connections(
-            source="NANAA", target="BULLFROG", time=datetime(2024, 8, 18, 17, 0)
-        )
+        with pytest.raises(PublicTransitClientException, match=_API_ERROR_MATCH):
+            client._send_get_request_bytes("/fake_endpoint")
+
+
+@pytest.mark.parametrize(
+    "method_name, path, kwargs, json_data, expected",
+    [
+        (
+            "search_stops",
+            "/schedule/stops/autocomplete",
+            dict(query="e", limit=5, search_type=SearchType.CONTAINS),
+            [_STOP_PAYLOAD],
+            [_STOP],
+        ),
+        (
+            "nearest_stops",
+            "/schedule/stops/nearest",
+            dict(
+                coordinate=_COORDINATE,
+                limit=3,
+                max_distance=100000,
+            ),
+            [{"stop": _STOP_PAYLOAD, "distance": 500}],
+            [DistanceToStop(stop=_STOP, distance=500)],
+        ),
+        (
+            "get_stop",
+            "/schedule/stops/NANAA",
+            dict(stop_id="NANAA"),
+            _NANAA_PAYLOAD,
+            _NANAA,
+        ),
+        (
+            "get_next_departures",
+            "/schedule/stops/NANAA/departures",
+            dict(stop="NANAA", departure=_TIME),
+            [_DEPARTURE_PAYLOAD],
+            [_DEPARTURE],
+        ),
+        (
+            "get_connections",
+            "/routing/connections",
+            dict(source="NANAA", target="BULLFROG", time=_TIME),
+            [_CONNECTION_PAYLOAD],
+            [_CONNECTION],
+        ),
+        (
+            "get_isolines",
+            "/routing/isolines",
+            dict(
+                source="NANAA",
+                time=_TIME,
+                return_connections=True,
+            ),
+            [_STOP_CONNECTION_PAYLOAD],
+            [_STOP_CONNECTION],
+        ),
+    ],
+    ids=[
+        "search_stops",
+        "nearest_stops",
+        "get_stop",
+        "get_next_departures",
+        "get_connections",
+        "get_isolines",
+    ],
+)
+def test_endpoint(
+    client, requests_mock, method_name, path, kwargs, json_data, expected
+):
+    requests_mock.get(f"http://fakehost{path}", json=json_data)
+
+    # compare the dumps, since models like Stop compare by ID only
+    assert _dump(getattr(client, method_name)(**kwargs)) == _dump(expected)
+
+
+def test_get_stop_quotes_stop_id(client, requests_mock):
+    requests_mock.get(
+        "http://fakehost/schedule/stops/8500010%3A0%3A1%2FA%23", text="null"
+    )
+
+    stop = client.get_stop(stop_id="8500010:0:1/A#")
+
+    assert stop is None
+
+
+def test_get_stop_cached(requests_mock):
+    requests_mock.get("http://fakehost/schedule/stops/NANAA", json=_NANAA_PAYLOAD)
+
+    with PublicTransitClient(host="http://fakehost") as client:
+        first = client.get_stop(stop_id="NANAA")
+        second = client.get_stop(stop_id="NANAA")
+
+        # a cache hit returns the validated model instead of decoding the body again
+        assert first is second
+        assert requests_mock.call_count == 1
+
+        client.clear_cache()
+        client.get_stop(stop_id="NANAA")
+
+        assert requests_mock.call_count == 2
+
+
+def test_get_stop_cached_none(requests_mock):
+    requests_mock.get("http://fakehost/schedule/stops/NANAA", text="null")
+
+    with PublicTransitClient(host="http://fakehost") as client:
+        assert client.get_stop(stop_id="NANAA") is None
+        assert client.get_stop(stop_id="NANAA") is None
+
+    assert requests_mock.call_count == 1
 
-        assert isinstance(connections, list)
-        assert len(connections) == 1
-        assert isinstance(connections[0], Connection)
-
-
-@pytest.mark.unit
-def test_get_isolines(client):
-    with patch("requests.get") as mock_get:
-        mock_get.return_value = mock_response(
-            status=200,
-            json_data=[
-                {
-                    "stop": {
-                        "id": "1",
-                        "name": "Stop 1",
-                        "coordinates": {"latitude": 36.0, "longitude": -116.0},
-                    },
-                    "connectingLeg": {
-                        "from": {"latitude": 36.0, "longitude": -116.0},
-                        "to": {"latitude": 37.0, "longitude": -117.0},
-                        "type": "ROUTE",
-                        "departureTime": "2024-08-18T17:34:03",
-                        "arrivalTime": "2024-08-18T18:00:00",
-                    },
-                }
-            ],
+
+def test_search_stops_cached_list_is_copied(requests_mock):
+    requests_mock.get(
+        "http://fakehost/schedule/stops/autocomplete", json=[_STOP_PAYLOAD]
+    )
+
+    with PublicTransitClient(host="http://fakehost") as client:
+        client.search_stops("e").clear()
+        stops = client.search_stops("e")
+
+    assert _dump(stops) == _dump([_STOP])
+    assert requests_mock.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "cache_size, latitude, longitude",
+    [(1024, "36.12346", "-116.12346"), (0, "36.123456789", "-116.123456789")],
+    ids=["cached", "uncached"],
+)
+def test_nearest_stops_coordinate_precision(
+    requests_mock, cache_size, latitude, longitude
+):
+    requests_mock.get("http://fakehost/schedule/stops/nearest", json=[])
+
+    with PublicTransitClient(host="http://fakehost", cache_size=cache_size) as client:
+        client.nearest_stops(
+            Coordinate(latitude=36.123456789, longitude=-116.123456789)
         )
 
+    assert requests_mock.last_request.qs["latitude"] == [latitude]
+    assert requests_mock.last_request.qs["longitude"] == [longitude]
+
+
+def test_get_stop_cached_from_threads(requests_mock):
+    requests_mock.get("http://fakehost/schedule/stops/NANAA", json=_NANAA_PAYLOAD)
+
+    with (
+        PublicTransitClient(host="http://fakehost", cache_ttl=60) as client,
+        ThreadPoolExecutor(max_workers=8) as executor,
+    ):
+        stops = list(executor.map(lambda _: client.get_stop("NANAA"), range(64)))
+
+    assert all(_dump(stop) == _dump(_NANAA) for stop in stops)
+
+
+def test_build_params_dict_date_time():
+    params = PublicTransitClient._build_params_dict(
+        "NANAA",
+        time=datetime(2024, 8, 18, 17, 0, 30, 123456, tzinfo=timezone.utc),
+    )
+
+    assert params["dateTime"] == "2024-08-18T17:00:30"
+    assert "dateTime" not in PublicTransitClient._build_params_dict("NANAA")
+
+
+def test_build_params_dict_locations():
+    params = PublicTransitClient._build_params_dict(
+        Stop(
+            id="NANAA",
+            name="Stop NANAA",
+            coordinates=_COORDINATE,
+        ),
+        (37.0, -117.0),
+    )
+
+    assert params["sourceStopId"] == "NANAA"
+    assert params["targetLatitude"] == 37.0
+    assert params["targetLongitude"] == -117.0
+
+    params = PublicTransitClient._build_params_dict(_COORDINATE, "BULLFROG")
+
+    assert params["sourceLatitude"] == 36.0
+    assert params["sourceLongitude"] == -116.0
+    assert params["targetStopId"] == "BULLFROG"
+
+
+def test_build_params_dict_query_config():
+    params = PublicTransitClient._build_params_dict(
+        "NANAA",
+        "BULLFROG",
+        query_config=QueryConfig(
+            max_num_transfers=2, max_walking_duration=600, accessibility=False
+        ),
+    )
+
+    assert params["maxTransferNumber"] == 2
+    assert params["maxWalkingDuration"] == 600
+    assert params["wheelchairAccessible"] == "false"
+    assert "maxTravelTime" not in params
+    assert "bikesAllowed" not in params
+    assert "travelModes" not in params
+
+
+def test_get_isolines_does_not_stream(client, requests_mock):
+    requests_mock.get(
+        "http://fakehost/routing/isolines", json=[_STOP_CONNECTION_PAYLOAD]
+    )
+
+    with patch("public_transit_client.client.ijson") as mock_ijson:
         isolines = client.get_isolines(
-            source="NANAA",
-            time=datetime(2024, 8, 18, 17, 0),
-            return_connections=True,
+            source="NANAA", time=_TIME, return_connections=True
+        )
+
+    assert _dump(isolines) == _dump([_STOP_CONNECTION])
+    mock_ijson.items.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "ijson_module", [client_module.ijson, None], ids=["streaming", "without_ijson"]
+)
+def test_get_isolines_iter(client, requests_mock, ijson_module):
+    requests_mock.get(
+        "http://fakehost/routing/isolines", json=[_STOP_CONNECTION_PAYLOAD]
+    )
+
+    with patch("public_transit_client.client.ijson", ijson_module):
+        isolines = list(
+            client.get_isolines_iter(
+                source="NANAA", time=_TIME, return_connections=True
+            )
         )
 
-        assert isinstance(isolines, list)
-        assert len(isolines) == 1
-        assert isinstance(isolines[0], StopConnection)
+    assert _dump(isolines) == _dump([_STOP_CONNECTION])
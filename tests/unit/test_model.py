@@ -0,0 +1,448 @@
+import subprocess
+import sys
+from dataclasses import FrozenInstanceError
+from datetime import datetime
+
+import pytest
+from pydantic import ValidationError
+
+from public_transit_client import model
+from public_transit_client.model import (
+    Connection,
+    Coordinate,
+    Leg,
+    LegType,
+    Stop,
+    StopTime,
+    TransportMode,
+    Trip,
+    nearest_by_haversine,
+    stops_to_soa,
+)
+
+pytestmark = pytest.mark.unit
+
+# the jit decision is taken at import time, so it is checked in a fresh interpreter
+_HAVERSINE_SCRIPT = """
+from public_transit_client import model
+print(hasattr(model._haversine, "py_func"), model._haversine(47.3769, 8.5417, 46.9480, 7.4474))
+"""
+
+
+def _leg(
+    from_coordinate: Coordinate,
+    to_coordinate: Coordinate,
+    leg_type: LegType = LegType.WALK,
+    minutes: int = 10,
+) -> Leg:
+    return Leg.model_validate(
+        {
+            "from": from_coordinate,
+            "to": to_coordinate,
+            "type": leg_type,
+            "departureTime": datetime(2024, 8, 18, 17, 0),
+            "arrivalTime": datetime(2024, 8, 18, 17, minutes),
+        }
+    )
+
+
+def test_pairwise_haversine():
+    pytest.importorskip("numpy")
+
+    distances = Coordinate.pairwise_haversine(
+        [47.3769, 46.9480], [8.5417, 7.4474], [46.9480, 47.3769], [7.4474, 8.5417]
+    )
+
+    assert len(distances) == 2
+    assert distances[0] == pytest.approx(95_500, rel=0.01)
+    assert distances[0] == pytest.approx(distances[1])
+
+
+def test_travel_distance():
+    zurich = Coordinate(latitude=47.3769, longitude=8.5417)
+    bern = Coordinate(latitude=46.9480, longitude=7.4474)
+    connection = Connection(legs=[_leg(zurich, bern), _leg(bern, zurich)])
+
+    assert connection.travel_distance == pytest.approx(2 * zurich.distance_to(bern))
+
+
+def test_distance_to():
+    zurich = Coordinate(latitude=47.3769, longitude=8.5417)
+    bern = Coordinate(latitude=46.9480, longitude=7.4474)
+
+    assert zurich.distance_to(bern) == pytest.approx(
+        zurich.distance_to(bern, accurate=True), rel=0.005
+    )
+    assert zurich.distance_to(zurich) == 0
+
+
+def test_connection_is_frozen():
+    zurich = Coordinate(latitude=47.3769, longitude=8.5417)
+    bern = Coordinate(latitude=46.9480, longitude=7.4474)
+    connection = Connection(legs=[_leg(zurich, bern)])
+
+    assert connection.walk_distance == connection.legs[0].distance
+    with pytest.raises(ValidationError):
+        connection.legs = []
+    with pytest.raises(ValidationError):
+        connection.legs[0].type = LegType.ROUTE
+
+
+def test_connection_aggregates():
+    zurich = Coordinate(latitude=47.3769, longitude=8.5417)
+    bern = Coordinate(latitude=46.9480, longitude=7.4474)
+    basel = Coordinate(latitude=47.5596, longitude=7.5886)
+    connection = Connection(
+        legs=[
+            _leg(zurich, zurich, minutes=5),
+            _leg(zurich, bern, LegType.ROUTE, minutes=56),
+            _leg(bern, basel, LegType.ROUTE, minutes=55),
+            _leg(basel, basel, minutes=3),
+        ]
+    )
+
+    assert connection.walk_duration == 8 * 60
+    assert connection.route_duration == 111 * 60
+    assert connection.travel_duration == 119 * 60
+    assert connection.walk_distance == 0
+    assert connection.route_distance == pytest.approx(
+        zurich.distance_to(bern) + bern.distance_to(basel)
+    )
+    assert connection.travel_distance == connection.route_distance
+    assert connection.num_transfers == 1
+    assert connection.num_same_station_transfers == 1
+    assert connection.first_route_leg is connection.legs[1]
+    assert connection.last_route_leg is connection.legs[2]
+
+    walk_only = Connection(legs=[_leg(zurich, bern)])
+    assert walk_only.first_route_leg is None
+    assert walk_only.last_stop is None
+
+
+def _route_leg(stop_ids: list[str], from_stop_id: str, to_stop_id: str) -> Leg:
+    def stop(stop_id: str) -> dict:
+        return {
+            "id": stop_id,
+            "name": stop_id,
+            "coordinates": {"latitude": 47.0, "longitude": 8.0},
+        }
+
+    stop_time = {
+        "arrivalTime": "2024-08-18T17:00:00",
+        "departureTime": "2024-08-18T17:00:00",
+    }
+    return Leg.model_validate(
+        {
+            "from": {"latitude": 47.0, "longitude": 8.0},
+            "fromStop": stop(from_stop_id),
+            "to": {"latitude": 47.0, "longitude": 8.0},
+            "toStop": stop(to_stop_id),
+            "type": "ROUTE",
+            "departureTime": "2024-08-18T17:00:00",
+            "arrivalTime": "2024-08-18T17:30:00",
+            "trip": {
+                "headSign": "Loop",
+                "route": {
+                    "id": "R1",
+                    "name": "Route 1",
+                    "shortName": "1",
+                    "transportMode": "BUS",
+                    "transportModeDescription": "Bus",
+                },
+                "stopTimes": [
+                    {"stop": stop(stop_id), **stop_time} for stop_id in stop_ids
+                ],
+                "bikesAllowed": False,
+                "wheelchairAccessible": False,
+            },
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "stop_ids, from_stop_id, to_stop_id, num_stops",
+    [
+        (["A", "B", "C", "D"], "B", "D", 2),
+        (["A", "B", "C", "A", "D"], "A", "D", 1),
+        (["A", "B", "C"], "B", "B", 0),
+    ],
+)
+def test_leg_num_stops(stop_ids, from_stop_id, to_stop_id, num_stops):
+    assert _route_leg(stop_ids, from_stop_id, to_stop_id).num_stops == num_stops
+
+
+@pytest.mark.parametrize(
+    "from_stop_id, to_stop_id, match",
+    [("A", "X", "not found"), ("X", "C", "not found"), ("C", "A", "comes before")],
+)
+def test_leg_num_stops_invalid(from_stop_id, to_stop_id, match):
+    with pytest.raises(ValueError, match=match):
+        _ = _route_leg(["A", "B", "C"], from_stop_id, to_stop_id).num_stops
+
+
+def test_stop_equality():
+    stop = Stop(
+        id="NANAA",
+        name="Stop NANAA",
+        coordinates=Coordinate(latitude=36.0, longitude=-116.0),
+    )
+    same_stop = Stop(
+        id="NANAA",
+        name="Nanaa",
+        coordinates=Coordinate(latitude=36.1, longitude=-116.1),
+    )
+    other_stop = Stop(
+        id="BULLFROG",
+        name="Stop NANAA",
+        coordinates=Coordinate(latitude=36.0, longitude=-116.0),
+    )
+
+    assert stop == same_stop
+    assert stop != other_stop
+    assert len({stop, same_stop, other_stop}) == 2
+    assert stop != "NANAA"
+
+
+def test_trip_stop_times_validated_lazily():
+    trip = _route_leg(["A", "B", "C"], "A", "C").trip
+    assert trip is not None
+
+    assert "stop_times" not in trip.__dict__
+    assert [stop_time.stop.id for stop_time in trip.stop_times] == ["A", "B", "C"]
+    assert isinstance(trip.stop_times[0], StopTime)
+
+
+def _python_trip(stop_times: list) -> Trip:
+    return Trip.model_validate(
+        {
+            "head_sign": "Loop",
+            "route": {
+                "id": "R1",
+                "name": "Route 1",
+                "short_name": "1",
+                "transport_mode": TransportMode.BUS,
+                "transport_mode_description": "Bus",
+            },
+            "stop_times": stop_times,
+            "bikes_allowed": False,
+            "wheelchair_accessible": False,
+        }
+    )
+
+
+def _stop(stop_id: str) -> Stop:
+    return Stop(
+        id=stop_id, name=stop_id, coordinates=Coordinate(latitude=47.0, longitude=8.0)
+    )
+
+
+def test_trip_stop_times_by_name():
+    trip = _python_trip(
+        [
+            StopTime(
+                stop=_stop(stop_id),
+                arrival_time=datetime(2024, 8, 18, 17, 0),
+                departure_time=datetime(2024, 8, 18, 17, 0),
+            )
+            for stop_id in ("A", "B")
+        ]
+    )
+
+    assert [stop_time.stop.id for stop_time in trip.stop_times] == ["A", "B"]
+
+    dumped = trip.model_dump()
+    assert "raw_stop_times" not in dumped
+    assert [stop_time["stop"]["id"] for stop_time in dumped["stop_times"]] == [
+        "A",
+        "B",
+    ]
+
+    dumped = trip.model_dump(by_alias=True)
+    assert dumped["stopTimes"][0]["arrivalTime"] == datetime(2024, 8, 18, 17, 0)
+    assert [
+        stop_time.stop.id for stop_time in Trip.model_validate(dumped).stop_times
+    ] == ["A", "B"]
+
+
+def test_trip_equality():
+    trip = _route_leg(["A", "B", "C"], "A", "C").trip
+    assert trip is not None
+
+    from_models = _python_trip(list(trip.stop_times))
+
+    assert from_models == trip
+    assert hash(from_models) == hash(trip)
+    assert Trip.model_validate(trip.model_dump()) == trip
+    assert Trip.model_validate_json(trip.model_dump_json(by_alias=True)) == trip
+    assert _python_trip(trip.stop_times[:2]) != trip
+    assert "raw_stop_times" not in Trip.model_fields
+
+
+def test_trip_model_copy_stop_times():
+    trip = _route_leg(["A", "B", "C"], "A", "C").trip
+    assert trip is not None
+    assert trip._stop_ids == ["A", "B", "C"]
+
+    copied = trip.model_copy(update={"stop_times": trip.stop_times[:2]})
+
+    assert [stop_time.stop.id for stop_time in copied.stop_times] == ["A", "B"]
+    assert copied._stop_ids == ["A", "B"]
+    assert len(copied.model_dump()["stop_times"]) == 2
+
+
+def test_leg_num_stops_python_trip():
+    trip = _python_trip(
+        [
+            {
+                "stop": _stop(stop_id),
+                "arrival_time": datetime(2024, 8, 18, 17, 0),
+                "departure_time": datetime(2024, 8, 18, 17, 0),
+            }
+            for stop_id in ("A", "B", "C")
+        ]
+    )
+    leg = Leg.model_validate(
+        {
+            "from_coordinate": Coordinate(latitude=47.0, longitude=8.0),
+            "from_stop": _stop("A"),
+            "to_coordinate": Coordinate(latitude=47.0, longitude=8.0),
+            "to_stop": _stop("C"),
+            "type": LegType.ROUTE,
+            "departure_time": datetime(2024, 8, 18, 17, 0),
+            "arrival_time": datetime(2024, 8, 18, 17, 30),
+            "trip": trip,
+        }
+    )
+
+    assert leg.num_stops == 2
+    with pytest.raises(ValueError):
+        _ = leg.model_copy(
+            update={"trip": _python_trip([{"arrival_time": "2024-08-18T17:00:00"}])}
+        ).num_stops
+
+
+def test_populate_by_name():
+    coordinate = Coordinate(latitude=36.0, longitude=-116.0)
+
+    assert Stop(id="NANAA", name="Stop NANAA", coordinate=coordinate) == Stop(
+        id="NANAA", name="Stop NANAA", coordinates=coordinate
+    )
+
+
+def test_coordinate_is_hashable():
+    coordinate = Coordinate(latitude=36.0, longitude=-116.0)
+
+    assert {coordinate: 1}[Coordinate(latitude=36.0, longitude=-116.0)] == 1
+    with pytest.raises(FrozenInstanceError):
+        coordinate.latitude = 37.0  # type: ignore[misc]
+
+
+def test_multi_date():
+    coordinate = Coordinate(latitude=47.3769, longitude=8.5417)
+    leg = _leg(coordinate, coordinate)
+    overnight_leg = leg.model_copy(
+        update={"arrival_time": datetime(2024, 8, 19, 0, 10)}
+    )
+
+    assert not Connection(legs=[leg]).multi_date
+    assert Connection(legs=[overnight_leg]).multi_date
+
+
+def test_duration_longer_than_a_day():
+    coordinate = Coordinate(latitude=47.3769, longitude=8.5417)
+    leg = _leg(coordinate, coordinate).model_copy(
+        update={"arrival_time": datetime(2024, 8, 19, 18, 0)}
+    )
+
+    assert leg.duration == 25 * 3600
+    assert Connection(legs=[leg]).duration == 25 * 3600
+
+
+def test_model_copy_drops_cached_properties():
+    coordinate = Coordinate(latitude=47.3769, longitude=8.5417)
+    leg = _leg(coordinate, coordinate)
+    connection = Connection(legs=[leg])
+    assert leg.duration == 600
+    assert leg.is_walk
+    assert connection.walk_duration == 600
+    assert connection.route_duration == 0
+    assert connection.duration == 600
+
+    route_leg = leg.model_copy(
+        update={"arrival_time": datetime(2024, 8, 18, 18, 10), "type": LegType.ROUTE}
+    )
+    updated = connection.model_copy(update={"legs": [route_leg]})
+
+    assert route_leg.duration == 4200
+    assert route_leg.is_route
+    assert not route_leg.is_walk
+    assert updated.walk_duration == 0
+    assert updated.route_duration == 4200
+    assert updated.duration == 4200
+
+
+def test_nearest_by_haversine():
+    pytest.importorskip("numpy")
+
+    origin = Coordinate(latitude=47.0, longitude=8.0)
+    stops = [
+        Stop(
+            id=f"S{i}",
+            name=f"Stop {i}",
+            coordinate=Coordinate(latitude=47.0 + offset, longitude=8.0),
+        )
+        for i, offset in enumerate([0.03, 0.01, 0.04, 0.02])
+    ]
+
+    nearest = nearest_by_haversine(origin, stops, k=2)
+
+    assert [result.stop.id for result in nearest] == ["S1", "S3"]
+    assert nearest[0].distance == pytest.approx(origin.distance_to(stops[1].coordinate))
+    assert len(nearest_by_haversine(origin, stops, k=10)) == 4
+    assert nearest_by_haversine(origin, [], k=2) == []
+
+    ids, lats, lons = stops_to_soa(stops)
+    assert list(ids) == ["S0", "S1", "S2", "S3"]
+    assert lats[1] == 47.01
+
+
+def test_distance_to_fast():
+    origin = Coordinate(latitude=47.3769, longitude=8.5417)
+    nearby = Coordinate(latitude=47.3669, longitude=8.5517)
+    far = Coordinate(latitude=46.9480, longitude=7.4474)
+
+    assert origin.distance_to(nearby, fast=True) == pytest.approx(
+        origin.distance_to(nearby), abs=0.05
+    )
+    assert origin.distance_to(far, fast=True) == origin.distance_to(far)
+
+
+def test_haversine_not_compiled_by_default(monkeypatch):
+    monkeypatch.delenv(model._JIT_ENV_VAR, raising=False)
+    result = subprocess.run(
+        [sys.executable, "-c", _HAVERSINE_SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    compiled, distance = result.stdout.split()
+    assert compiled == "False"
+    assert float(distance) == pytest.approx(95_500, rel=0.01)
+
+
+def test_haversine_compiled_on_request(monkeypatch):
+    pytest.importorskip("numba")
+    monkeypatch.setenv(model._JIT_ENV_VAR, "1")
+    result = subprocess.run(
+        [sys.executable, "-c", _HAVERSINE_SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    compiled, distance = result.stdout.split()
+    assert compiled == "True"
+    assert float(distance) == pytest.approx(
+        model._haversine(47.3769, 8.5417, 46.9480, 7.4474)
+    )